@@ -18,6 +18,7 @@ from akl.utils import kodilogging, kodi, io
 from akl.launchers import ExecutionSettings, get_executor_factory
 
 from resources.lib.launcher import RetroarchLauncher
+from resources.lib.launchlock import LaunchLock
 
 kodilogging.config()
 logger = logging.getLogger(__name__)
@@ -69,6 +70,17 @@ def run_plugin():
 def launch_rom(args: addons.AklAddonArguments):
     logging.debug('Retroarch Launcher: Starting ...')
     
+    addon_dir = kodi.getAddonDir()
+    launch_lock = LaunchLock(
+        addon_dir.pjoin('locks', isdir=True).getPathTranslated(),
+        args.get_akl_addon_id(),
+        args.get_entity_id(),
+        settings.getSettingAsInt('launch_lock_window'))
+    
+    if not launch_lock.acquire():
+        logger.info('Retroarch Launcher: Same ROM is already being launched. Ignoring request.')
+        return
+    
     try:
         execution_settings = ExecutionSettings()
         execution_settings.delay_tempo = settings.getSettingAsInt('delay_tempo')
@@ -79,7 +91,6 @@ def launch_rom(args: addons.AklAddonArguments):
         execution_settings.suspend_screensaver = settings.getSettingAsBool('suspend_screensaver')
         execution_settings.suspend_joystick_engine = settings.getSettingAsBool('suspend_joystick')
         
-        addon_dir = kodi.getAddonDir()
         report_path = addon_dir.pjoin('reports')
         if not report_path.exists():
             report_path.makedirs()
@@ -99,6 +110,8 @@ def launch_rom(args: addons.AklAddonArguments):
     except Exception as e:
         logger.error('Exception while executing ROM', exc_info=e)
         kodi.notify_error('Failed to execute ROM')
+    finally:
+        launch_lock.release()
 
 
 # Arguments: --akl_addon_id --rom_id
@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+#
+# Advanced Kodi Launcher: Retroarch launcher
+#
+# Copyright (c) Chrisism <crizizz@gmail.com>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; version 2 of the License.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# Headless command line entry point for scripting and batch provisioning.
+# Run from the addon folder:
+#   python -m resources.lib.cli cores --config ~/.config/retroarch/retroarch.cfg
+#   python -m resources.lib.cli configs --application ~/.config/retroarch/
+#   python -m resources.lib.cli command --launchers launchers.json
+#
+# Output is written as JSON to stdout, logging goes to stderr.
+
+# --- Python standard library ---
+from __future__ import unicode_literals
+from __future__ import division
+
+import os
+import sys
+import json
+import argparse
+import logging
+import typing
+
+from resources.lib import xbmcstandin
+xbmcstandin.install()
+
+# --- AKL packages ---
+from akl.api import ROMObj  # noqa: E402
+from akl.executors import ExecutorABC  # noqa: E402
+from akl.launchers import ExecutionSettings  # noqa: E402
+from akl.utils import io  # noqa: E402
+
+from resources.lib.launcher import RetroarchLauncher  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+
+# -------------------------------------------------------------------------------------------------
+# Launcher which gets its settings and ROM from the caller instead of the AKL webservice.
+# The command is resolved by a real launch with an executor that only records what it would
+# execute, so all argument handling of the launcher and AKL applies, like escape_romfile.
+# -------------------------------------------------------------------------------------------------
+class HeadlessRetroarchLauncher(RetroarchLauncher):
+
+    def __init__(self, launcher_settings: dict, rom_id: str = None, rom_file: str = None):
+        execution_settings = ExecutionSettings()
+        execution_settings.delay_tempo = 0
+        execution_settings.display_launcher_notify = False
+        execution_settings.is_non_blocking = True
+
+        self.executor = RecordingExecutor()
+        super(HeadlessRetroarchLauncher, self).__init__(None, rom_id, None, 0, RecordingExecutorFactory(self.executor),
+                                                        execution_settings)
+        self.launcher_settings.update(launcher_settings)
+        for key in ['application', 'retro_config', 'retro_core', 'retro_core_info']:
+            if isinstance(self.launcher_settings.get(key), str):
+                self.launcher_settings[key] = os.path.expanduser(self.launcher_settings[key])
+
+        # Without a ROM file the $rom$ placeholder is kept in the command.
+        rom_path = os.path.expanduser(rom_file) if rom_file else '$rom$'
+        self.rom = ROMObj({'id': rom_id, 'scanned_data': {'file': rom_path}})
+
+    def get_command(self) -> dict:
+        self.launch()
+
+        application = self.executor.application
+        if isinstance(application, io.FileName):
+            application = application.getPath()
+
+        return {
+            'application': application,
+            'arguments': [str(argument) for argument in self.executor.arguments],
+            'kwargs': self.executor.kwargs
+        }
+
+
+class RecordingExecutor(ExecutorABC):
+
+    def __init__(self):
+        self.application = None
+        self.arguments = []
+        self.kwargs = {}
+        super(RecordingExecutor, self).__init__(None)
+
+    def execute(self, application: str, *args, **kwargs):
+        self.application = application
+        self.arguments = list(args)
+        self.kwargs = dict(kwargs)
+
+
+class RecordingExecutorFactory(object):
+
+    def __init__(self, executor: RecordingExecutor):
+        self.executor = executor
+
+    def create(self, *args, **kwargs) -> RecordingExecutor:
+        return self.executor
+
+
+# -------------------------------------------------------------------------------------------------
+# Commands
+# -------------------------------------------------------------------------------------------------
+def list_cores(args) -> typing.Tuple[list, bool]:
+    launcher = HeadlessRetroarchLauncher({})
+    results = []
+    is_success = True
+    for retro_config in args.config:
+        try:
+            results.append({'config': retro_config, 'cores': launcher.scan_retroarch_cores(os.path.expanduser(retro_config))})
+        except Exception as ex:
+            logger.error(f'Cannot scan cores for "{retro_config}"', exc_info=ex)
+            results.append({'config': retro_config, 'error': str(ex)})
+            is_success = False
+    return results, is_success
+
+
+def list_configs(args) -> typing.Tuple[list, bool]:
+    launcher = HeadlessRetroarchLauncher({})
+    results = []
+    is_success = True
+    for application in args.application:
+        try:
+            configs = launcher.scan_retroarch_configurations(os.path.expanduser(application))
+            results.append({'application': application, 'configs': [config.getPath() for config in configs]})
+        except Exception as ex:
+            logger.error(f'Cannot scan configurations for "{application}"', exc_info=ex)
+            results.append({'application': application, 'error': str(ex)})
+            is_success = False
+    return results, is_success
+
+
+#
+# Resolves the launch command for every launcher/ROM combination in the launchers file:
+# [
+#   {
+#       "id": "snes",
+#       "settings": { "application": "...", "retro_config": "...", "retro_core": "...", ... },
+#       "roms": [ { "id": "abc", "file": "/roms/snes/superrom.zip" } ]
+#   }
+# ]
+#
+def resolve_commands(args) -> typing.Tuple[list, bool]:
+    if args.launchers == '-':
+        launchers = json.load(sys.stdin)
+    else:
+        with open(args.launchers, 'r', encoding='utf-8') as launchers_file:
+            launchers = json.load(launchers_file)
+
+    results = []
+    is_success = True
+    for launcher_entry in launchers:
+        launcher_id = launcher_entry.get('id')
+        roms = launcher_entry.get('roms', [{}])
+        for rom in roms:
+            result = {'launcher': launcher_id, 'rom': rom.get('id'), 'file': rom.get('file')}
+            try:
+                launcher = HeadlessRetroarchLauncher(launcher_entry['settings'], rom.get('id'), rom.get('file'))
+                result.update(launcher.get_command())
+            except Exception as ex:
+                logger.error(f'Cannot resolve command for launcher "{launcher_id}"', exc_info=ex)
+                result['error'] = str(ex)
+                is_success = False
+            results.append(result)
+    return results, is_success
+
+
+def main(argv: typing.List[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog='retroarchlauncher', description='Headless Retroarch launcher for AKL')
+    parser.add_argument('--kodi-home', help='Kodi home folder used for addon data (default ~/.kodi)')
+    parser.add_argument('-v', '--verbose', action='store_true', help='Enable debug logging')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    cores_parser = subparsers.add_parser('cores', help='List available cores with metadata')
+    cores_parser.add_argument('--config', nargs='+', required=True, help='Path(s) to retroarch.cfg')
+    cores_parser.set_defaults(func=list_cores)
+
+    configs_parser = subparsers.add_parser('configs', help='List available Retroarch configuration files')
+    configs_parser.add_argument('--application', nargs='+', required=True, help='Path(s) to Retroarch application folder')
+    configs_parser.set_defaults(func=list_configs)
+
+    command_parser = subparsers.add_parser('command', help='Resolve the full launch command for launchers and ROMs, '
+                                                           'as executed by a launch from Kodi')
+    command_parser.add_argument('--launchers', required=True, help='JSON file with launchers and ROMs, - for stdin')
+    command_parser.set_defaults(func=resolve_commands)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(format='%(asctime)s %(module)s %(levelname)s: %(message)s',
+                        level=logging.DEBUG if args.verbose else logging.WARNING, stream=sys.stderr)
+    if args.kodi_home:
+        xbmcstandin.install(args.kodi_home)
+
+    results, is_success = args.func(args)
+    json.dump(results, sys.stdout, indent=2)
+    sys.stdout.write('\n')
+    return 0 if is_success else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -17,21 +17,31 @@
 from __future__ import unicode_literals
 from __future__ import division
 
+import os
 import logging
 import collections
 import typing
 
 # --- AKL packages ---
-from akl import settings
+from akl import settings, api
 from akl.utils import io, kodi
 from akl.launchers import LauncherABC
 
+from resources.lib.savestates import SavestateIndex, AUTO_SLOT
+from resources.lib import overlays
+
 
 # -------------------------------------------------------------------------------------------------
 # Read RetroarchLauncher.md
 # -------------------------------------------------------------------------------------------------
 class RetroarchLauncher(LauncherABC):
     
+    def __init__(self, *args, **kwargs):
+        self.retroarch_configurations = {}
+        self.rom = None
+        self.rom_file = None
+        super(RetroarchLauncher, self).__init__(*args, **kwargs)
+
     # --------------------------------------------------------------------------------------------
     # Core functions
     # --------------------------------------------------------------------------------------------
@@ -42,6 +52,23 @@ class RetroarchLauncher(LauncherABC):
         addon_id = kodi.get_addon_id()
         return addon_id
 
+    def launch(self):
+        # The base launch loads the ROM from the webservice and does not expose it. Route that request
+        # through the launcher so quick resume and ROM overrides reuse the same ROM instead of a second
+        # round trip to the webservice.
+        client_get_rom = api.client_get_rom
+
+        def get_rom(host, port, rom_id):
+            if self.rom is None:
+                self.rom = client_get_rom(host, port, rom_id)
+            return self.rom
+
+        api.client_get_rom = get_rom
+        try:
+            super(RetroarchLauncher, self).launch()
+        finally:
+            api.client_get_rom = client_get_rom
+
     # --------------------------------------------------------------------------------------------
     # Launcher build wizard methods
     # --------------------------------------------------------------------------------------------
@@ -128,37 +155,13 @@ class RetroarchLauncher(LauncherABC):
         configs['BROWSE'] = 'Browse for configuration'
         configs['TYPE'] = 'Enter configuration path manually'
 
-        retroarch_folders: typing.List[io.FileName] = []
-        retroarch_folders.append(io.FileName(launcher['application']))
-
-        if io.is_android():
-            retroarch_folders.append(io.FileName('/storage/emulated/0/Android/data/com.retroarch/'))
-            retroarch_folders.append(io.FileName('/data/data/com.retroarch/'))
-            retroarch_folders.append(io.FileName('/storage/sdcard0/Android/data/com.retroarch/'))
-            retroarch_folders.append(io.FileName('/data/user/0/com.retroarch/'))
-            retroarch_folders.append(io.FileName('/storage/emulated/0/Retroarch/'))
-
-        for retroarch_folder in retroarch_folders:
-            logging.debug(f"scanning path '{retroarch_folder.getPath()}'")
-            files = retroarch_folder.recursiveScanFilesInPath('*.cfg')
-            if len(files) == 0:
-                continue
-            for file in files:
-                logging.debug(f"adding config file '{file.getPath()}'")
-                configs[file.getPath()] = file.getBaseNoExt()
-
-            return configs
+        for file in self.scan_retroarch_configurations(launcher['application']):
+            configs[file.getPath()] = file.getBaseNoExt()
 
         return configs
 
     def _builder_get_available_retroarch_cores(self, item_key, launcher):
         cores_sorted = collections.OrderedDict()
-        cores_ext = ''
-
-        if io.is_windows():
-            cores_ext = 'dll'
-        else:
-            cores_ext = 'so'
 
         config_file = io.FileName(launcher['retro_config'])
         if not config_file.exists():
@@ -167,51 +170,18 @@ class RetroarchLauncher(LauncherABC):
             return cores_sorted
 
         parent_dir = io.FileName(config_file.getDir())
-        configuration = config_file.readPropertyFile()
-
+        configuration = self._get_retroarch_configuration(config_file)
         info_folder = self._create_path_from_retroarch_setting(configuration['libretro_info_path'], parent_dir)
-        cores_folder = self._create_path_from_retroarch_setting(configuration['libretro_directory'], parent_dir)
-        logging.debug(f"scanning path '{cores_folder.getPath()}'")
 
         if not info_folder.exists():
             logging.warning('Retroarch info folder not found {}'.format(info_folder.getPath()))
             kodi.notify_error('Retroarch info folder not found {}. Read documentation'.format(info_folder.getPath()))
             return cores_sorted
-    
-        # scan based on info folder and files since Retroarch on Android has it's core files in
-        # the app folder which is not readable without root privileges. Changing the cores folder
-        # will not work since Retroarch won't be able to load cores from a different folder due
-        # to security reasons. Changing that setting under Android will only result in a reset
-        # of that value after restarting Retroarch ( https://forums.libretro.com/t/directory-settings-wont-save/12753/3 )
-        # So we will scan based on info files (which setting path can be changed) and guess that
-        # the core files will be available.
-        cores = {}
-        files = info_folder.scanFilesInPath('*.info')
-        for info_file in files:
-            
-            if info_file.getBaseNoExt() == '00_example_libretro':
-                continue
-            logging.debug(f"get_available_retroarch_cores() adding core using info '{info_file.getPath()}'")
 
-            # check if core exists, if android just skip and guess it exists
-            if not io.is_android():
-                core_file = self._switch_info_to_core_file(info_file, cores_folder, cores_ext)
-                if not core_file.exists():
-                    logging.warning((f'get_available_retroarch_cores() Cannot find "{core_file.getPath()}". '
-                                    f'Skipping info "{info_file.getBase()}"'))
-                    continue
-                logging.debug(f"get_available_retroarch_cores() using core '{core_file.getPath()}'")
-                
-            core_info = info_file.readPropertyFile()
-            if 'display_name' in core_info:
-                cores[info_file.getPath()] = core_info['display_name']
-            else:
-                logging.warning(f'Cannot read display name for core {info_file.getBaseNoExt()}')
-                cores[info_file.getPath()] = info_file.getBaseNoExt()
-                
+        cores = self.scan_retroarch_cores(config_file.getPath())
         cores_sorted['BROWSE'] = 'Manual enter path to core'
-        for core_item in sorted(cores.items(), key=lambda x: x[1]):
-            cores_sorted[core_item[0]] = core_item[1]
+        for core in sorted(cores, key=lambda x: x['display_name']):
+            cores_sorted[core['info']] = core['display_name']
         return cores_sorted
 
     def _builder_load_selected_core_info(self, input: str, item_key, launchers_settings):
@@ -230,7 +200,7 @@ class RetroarchLauncher(LauncherABC):
 
         config_file = io.FileName(launchers_settings['retro_config'])
         parent_dir = io.FileName(config_file.getDir())
-        configuration = config_file.readPropertyFile()
+        configuration = self._get_retroarch_configuration(config_file)
         cores_folder = self._create_path_from_retroarch_setting(configuration['libretro_directory'], parent_dir)
         info_file = io.FileName(input)
         
@@ -267,6 +237,13 @@ class RetroarchLauncher(LauncherABC):
         options[self._change_config] = f"Change config: '{self.launcher_settings['retro_config']}'"
         options[self._change_core] = f"Change core: '{self.launcher_settings['retro_core']}'"
         options[self._change_launcher_arguments] = f"Modify Arguments: '{self.launcher_settings['args']}'"
+        if not io.is_android():
+            config_overrides = overlays.format_overrides(self.launcher_settings.get('config_overrides', {}))
+            options[self._change_config_overrides] = f"Modify config overrides: '{config_overrides}'"
+            rom_config_overrides = len(self.launcher_settings.get('rom_config_overrides', {}))
+            options[self._change_rom_config_overrides] = f"Modify ROM config overrides ({rom_config_overrides} ROMs)"
+            quick_resume = 'ON' if self.launcher_settings.get('quick_resume', False) else 'OFF'
+            options[self._change_quick_resume] = f"Resume last session: {quick_resume}"
         return options
     
     def _change_retroarch_path(self):
@@ -312,7 +289,141 @@ class RetroarchLauncher(LauncherABC):
         if args is None:
             return
         self.launcher_settings['args'] = args
+
+    def _change_config_overrides(self):
+        config_overrides = overlays.format_overrides(self.launcher_settings.get('config_overrides', {}))
+        config_overrides = kodi.dialog_keyboard('Edit config overrides (key=value; key=value)', text=config_overrides)
+
+        if config_overrides is None:
+            return
+        self.launcher_settings['config_overrides'] = overlays.parse_overrides(config_overrides)
+
+    def _change_rom_config_overrides(self):
+        rom_config_overrides = self.launcher_settings.get('rom_config_overrides', {})
+        options = collections.OrderedDict()
+        options['ADD'] = 'Add ROM'
+        for rom_name, config_overrides in rom_config_overrides.items():
+            options[rom_name] = f"{rom_name}: '{overlays.format_overrides(config_overrides)}'"
+
+        dialog = kodi.OrdDictionaryDialog()
+        selected_option = dialog.select('Select ROM', options)
+
+        if selected_option is None:
+            logging.debug('_change_rom_config_overrides(): Selected option = NONE')
+            return
+
+        rom_name = selected_option
+        if selected_option == 'ADD':
+            rom_name = kodi.dialog_keyboard('Enter ROM file name without extension')
+            if not rom_name:
+                return
+
+        config_overrides = overlays.format_overrides(rom_config_overrides.get(rom_name, {}))
+        config_overrides = kodi.dialog_keyboard(f'Edit config overrides for {rom_name} (empty to remove)', text=config_overrides)
+
+        if config_overrides is None:
+            return
+        config_overrides = overlays.parse_overrides(config_overrides)
+        if config_overrides:
+            rom_config_overrides[rom_name] = config_overrides
+        else:
+            rom_config_overrides.pop(rom_name, None)
+        self.launcher_settings['rom_config_overrides'] = rom_config_overrides
+
+    def _change_quick_resume(self):
+        self.launcher_settings['quick_resume'] = not self.launcher_settings.get('quick_resume', False)
         
+    # ---------------------------------------------------------------------------------------------
+    # Scan methods
+    # ---------------------------------------------------------------------------------------------
+    def scan_retroarch_configurations(self, application_path: str) -> typing.List[io.FileName]:
+        retroarch_folders: typing.List[io.FileName] = []
+        retroarch_folders.append(io.FileName(application_path))
+
+        if io.is_android():
+            retroarch_folders.append(io.FileName('/storage/emulated/0/Android/data/com.retroarch/'))
+            retroarch_folders.append(io.FileName('/data/data/com.retroarch/'))
+            retroarch_folders.append(io.FileName('/storage/sdcard0/Android/data/com.retroarch/'))
+            retroarch_folders.append(io.FileName('/data/user/0/com.retroarch/'))
+            retroarch_folders.append(io.FileName('/storage/emulated/0/Retroarch/'))
+
+        for retroarch_folder in retroarch_folders:
+            logging.debug(f"scanning path '{retroarch_folder.getPath()}'")
+            files = retroarch_folder.recursiveScanFilesInPath('*.cfg')
+            if len(files) == 0:
+                continue
+            logging.debug(f"found {len(files)} config files in '{retroarch_folder.getPath()}'")
+            return files
+
+        return []
+
+    def scan_retroarch_cores(self, retro_config: str) -> typing.List[dict]:
+        cores_ext = ''
+
+        if io.is_windows():
+            cores_ext = 'dll'
+        else:
+            cores_ext = 'so'
+
+        config_file = io.FileName(retro_config)
+        if not config_file.exists():
+            logging.warning(f'Retroarch config file not found: {config_file.getPath()}')
+            return []
+
+        parent_dir = io.FileName(config_file.getDir())
+        configuration = self._get_retroarch_configuration(config_file)
+
+        info_folder = self._create_path_from_retroarch_setting(configuration['libretro_info_path'], parent_dir)
+        cores_folder = self._create_path_from_retroarch_setting(configuration['libretro_directory'], parent_dir)
+        logging.debug(f"scanning path '{cores_folder.getPath()}'")
+
+        if not info_folder.exists():
+            logging.warning('Retroarch info folder not found {}'.format(info_folder.getPath()))
+            return []
+    
+        # scan based on info folder and files since Retroarch on Android has it's core files in
+        # the app folder which is not readable without root privileges. Changing the cores folder
+        # will not work since Retroarch won't be able to load cores from a different folder due
+        # to security reasons. Changing that setting under Android will only result in a reset
+        # of that value after restarting Retroarch ( https://forums.libretro.com/t/directory-settings-wont-save/12753/3 )
+        # So we will scan based on info files (which setting path can be changed) and guess that
+        # the core files will be available.
+        cores = []
+        files = info_folder.scanFilesInPath('*.info')
+        for info_file in files:
+            
+            if info_file.getBaseNoExt() == '00_example_libretro':
+                continue
+            logging.debug(f"scan_retroarch_cores() adding core using info '{info_file.getPath()}'")
+
+            # check if core exists, if android just skip and guess it exists
+            core_file = self._switch_info_to_core_file(info_file, cores_folder, cores_ext)
+            if not io.is_android():
+                if not core_file.exists():
+                    logging.warning((f'scan_retroarch_cores() Cannot find "{core_file.getPath()}". '
+                                    f'Skipping info "{info_file.getBase()}"'))
+                    continue
+                logging.debug(f"scan_retroarch_cores() using core '{core_file.getPath()}'")
+                
+            core_info = info_file.readPropertyFile()
+            if 'display_name' in core_info:
+                display_name = core_info['display_name']
+            else:
+                logging.warning(f'Cannot read display name for core {info_file.getBaseNoExt()}')
+                display_name = info_file.getBaseNoExt()
+
+            cores.append({
+                'info': info_file.getPath(),
+                'core': core_file.getPath(),
+                'display_name': display_name,
+                'corename': core_info.get('corename'),
+                'systemname': core_info.get('systemname'),
+                'manufacturer': core_info.get('manufacturer'),
+                'supported_extensions': core_info.get('supported_extensions')
+            })
+                
+        return cores
+
     # ---------------------------------------------------------------------------------------------
     # Execution methods
     # ---------------------------------------------------------------------------------------------
@@ -342,6 +453,13 @@ class RetroarchLauncher(LauncherABC):
             arguments.append(self.launcher_settings["retro_core"])
             arguments.append('-c')
             arguments.append(self.launcher_settings["retro_config"])
+            config_overrides = self._get_config_overrides()
+            if self.launcher_settings.get('quick_resume', False):
+                arguments.extend(self._get_quick_resume_arguments(config_overrides))
+            if config_overrides:
+                overlay_dir = kodi.getAddonDir().pjoin('overlays')
+                arguments.append('--appendconfig')
+                arguments.append(overlays.get_config_overlay(overlay_dir.getPathTranslated(), config_overrides))
             arguments.append('$rom$')
             
         if io.is_android():
@@ -354,20 +472,99 @@ class RetroarchLauncher(LauncherABC):
             arguments.append(f"LIBRETRO {self.launcher_settings['retro_core']}")
             arguments.append(f"CONFIGFILE {self.launcher_settings['retro_config']}")
             arguments.append("REFRESH 60")
+            if self.launcher_settings.get('quick_resume', False):
+                # Retroarch on Android does not read an entry slot from the intent extras.
+                logging.info('RetroarchLauncher::get_arguments() Quick resume is not supported on Android')
+            if self.launcher_settings.get('config_overrides') or self.launcher_settings.get('rom_config_overrides'):
+                # Retroarch on Android only accepts a single CONFIGFILE extra.
+                logging.info('RetroarchLauncher::get_arguments() Config overrides are not supported on Android')
             
             # arguments.append(f"IME com.android.inputmethod.latin/.LatinIME")
 
         return super().get_arguments(*arguments, **kwargs)
     
+    def _get_config_overrides(self) -> dict:
+        config_overrides = dict(self.launcher_settings.get('config_overrides', {}))
+        # ROM overrides are stored by ROM file name without extension, like Retroarch game overrides.
+        rom_config_overrides = self.launcher_settings.get('rom_config_overrides', {})
+        if rom_config_overrides:
+            rom_file = self._get_rom_file()
+            if rom_file is not None and rom_file.getBaseNoExt() in rom_config_overrides:
+                config_overrides.update(rom_config_overrides[rom_file.getBaseNoExt()])
+        return config_overrides
+
+    def _get_rom_file(self) -> io.FileName:
+        if self.rom_file is None:
+            if self.rom is None:
+                self.rom = api.client_get_rom(self.webservice_host, self.webservice_port, self.rom_id)
+            self.rom_file = self.rom.get_file()
+        return self.rom_file
+
+    def _get_quick_resume_arguments(self, config_overrides: dict) -> list:
+        # Quick resume is optional, a failing lookup should never block the launch itself.
+        try:
+            return self._find_quick_resume_arguments(config_overrides)
+        except Exception as ex:
+            logging.warning('RetroarchLauncher::_get_quick_resume_arguments() Cannot resolve save state, '
+                            'launching without resume', exc_info=ex)
+            return []
+
+    def _find_quick_resume_arguments(self, config_overrides: dict) -> list:
+        rom_file = self._get_rom_file()
+        if rom_file is None:
+            return []
+
+        state_folder = self._get_savestate_folder(rom_file)
+        index_file = kodi.getAddonDir().pjoin('savestates.json')
+        # Retroarch only accepts entry slots above 0, so the default slot (<content>.state) cannot be resumed.
+        state_path, slot = SavestateIndex(index_file.getPathTranslated()).find_latest(
+            [state_folder.getPathTranslated()], rom_file.getBaseNoExt(), exclude_slots=[0])
+        if state_path is None:
+            logging.debug(f'RetroarchLauncher::_find_quick_resume_arguments() No save state for "{rom_file.getBase()}"')
+            return []
+
+        if slot == AUTO_SLOT:
+            # The automatic state is loaded by Retroarch itself when auto loading is enabled.
+            config_overrides['savestate_auto_load'] = True
+            return []
+
+        return ['-e', str(slot)]
+
+    def _get_savestate_folder(self, rom_file: io.FileName) -> io.FileName:
+        config_file = io.FileName(self.launcher_settings['retro_config'])
+        parent_dir = io.FileName(config_file.getDir())
+        configuration = self._get_retroarch_configuration(config_file)
+
+        savestate_setting = configuration.get('savestate_directory', '')
+        if savestate_setting == '' or savestate_setting == 'default':
+            return io.FileName(rom_file.getDir(), isdir=True)
+        
+        state_folder = self._create_path_from_retroarch_setting(savestate_setting, parent_dir)
+        if configuration.get('sort_savestates_by_content_enable', 'false') == 'true':
+            content_dir_name = os.path.basename(os.path.normpath(rom_file.getDir()))
+            state_folder = state_folder.pjoin(content_dir_name, isdir=True)
+        core_info_path = self.launcher_settings.get('retro_core_info')
+        if configuration.get('sort_savestates_enable', 'false') == 'true' and core_info_path:
+            core_info = io.FileName(core_info_path).readPropertyFile()
+            if 'corename' in core_info:
+                state_folder = state_folder.pjoin(core_info['corename'], isdir=True)
+        return state_folder
+
     # ---------------------------------------------------------------------------------------------
     # Misc methods
     # ---------------------------------------------------------------------------------------------
+    def _get_retroarch_configuration(self, config_file: io.FileName) -> dict:
+        config_path = config_file.getPath()
+        if config_path not in self.retroarch_configurations:
+            self.retroarch_configurations[config_path] = config_file.readPropertyFile()
+        return self.retroarch_configurations[config_path]
+
     def _create_path_from_retroarch_setting(self, path_from_setting: str, parent_dir: io.FileName):
         if path_from_setting.startswith(':\\'):
             path_from_setting = path_from_setting[2:]
             return parent_dir.pjoin(path_from_setting, isdir=True)
         else:
-            folder = io.FileName(path_from_setting, isdir=True)
+            folder = io.FileName(os.path.expanduser(path_from_setting), isdir=True)
             # if '/data/user/0/' in folder.getPath():
             #     alternative_folder = folder.getPath()
             #     alternative_folder = alternative_folder.replace('/data/user/0/', '/data/data/')
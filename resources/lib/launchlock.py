@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+#
+# Advanced Kodi Launcher: Retroarch launcher
+#
+# Copyright (c) Chrisism <crizizz@gmail.com>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; version 2 of the License.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# --- Python standard library ---
+from __future__ import unicode_literals
+from __future__ import division
+
+import os
+import sys
+import re
+import json
+import time
+import uuid
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# -------------------------------------------------------------------------------------------------
+# Cross process launch lock.
+#
+# Every launch request from Kodi runs default.py again, so a double click or a repeating remote
+# can start a second Retroarch instance for the same ROM. The lock is a file per launcher/ROM
+# combination which is created atomically. A lock is considered held while the process that
+# created it is alive or while it is younger than the coalesce window. Repeated requests for a
+# held lock are collapsed into the launch which is already in progress. Locks left behind by
+# processes that died are cleared once the coalesce window has passed.
+# Addon scripts usually run inside the Kodi process itself, so the process id does not identify
+# a single launch. A lock that was never released would then be held until Kodi restarts. That is
+# why a lock older than MAX_AGE is always considered stale, even when its process is alive.
+# -------------------------------------------------------------------------------------------------
+class LaunchLock(object):
+
+    # Max age in seconds of the guard file used while clearing a stale lock and of a lock file
+    # which is still being written by its creator.
+    BREAK_GUARD_TIMEOUT = 5
+    # Max age in seconds of a lock, regardless of its process being alive.
+    MAX_AGE = 600
+
+    def __init__(self, lock_dir: str, launcher_id: str, rom_id: str, window: float = 5, max_age: float = MAX_AGE):
+        self.lock_dir = lock_dir
+        self.window = window
+        self.max_age = max_age
+        self.token = uuid.uuid4().hex
+        self.acquired_at = None
+
+        lock_name = re.sub(r'[^A-Za-z0-9_.-]', '_', f'{launcher_id}-{rom_id}')
+        self.lock_path = os.path.join(lock_dir, f'{lock_name}.lock')
+        self.guard_path = f'{self.lock_path}.break'
+
+    def acquire(self) -> bool:
+        if not os.path.isdir(self.lock_dir):
+            os.makedirs(self.lock_dir, exist_ok=True)
+
+        if self._try_create():
+            return True
+
+        if not self._is_stale():
+            logger.info(f'LaunchLock::acquire() Launch already in progress for "{self.lock_path}"')
+            return False
+
+        if not self._break_stale_lock():
+            return False
+
+        return self._try_create()
+
+    def release(self):
+        if self.acquired_at is None:
+            return
+
+        lock_data = self._read_lock()
+        if lock_data is None or lock_data.get('token') != self.token:
+            logger.warning(f'LaunchLock::release() Lock "{self.lock_path}" is not owned by this launch')
+            self.acquired_at = None
+            return
+
+        # Keep the lock around until the window has passed so repeated requests arriving right
+        # after a non-blocking launch returned are still collapsed.
+        if time.time() - self.acquired_at < self.window:
+            lock_data['pid'] = None
+            self._write_lock(lock_data)
+        else:
+            self._remove(self.lock_path)
+        self.acquired_at = None
+
+    # ---------------------------------------------------------------------------------------------
+    # Lock file methods
+    # ---------------------------------------------------------------------------------------------
+    def _try_create(self) -> bool:
+        try:
+            fd = os.open(self.lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return False
+
+        acquired_at = time.time()
+        lock_data = {'pid': os.getpid(), 'token': self.token, 'acquired': acquired_at}
+        with os.fdopen(fd, 'w') as lock_file:
+            json.dump(lock_data, lock_file)
+
+        self.acquired_at = acquired_at
+        logger.debug(f'LaunchLock::_try_create() Acquired lock "{self.lock_path}"')
+        return True
+
+    def _is_stale(self) -> bool:
+        lock_data = self._read_lock()
+        if lock_data is None:
+            # Either just removed or still being written by its creator. A lock being written is
+            # held for a fixed grace period, the window can be 0 and would break it right away.
+            try:
+                modified = os.path.getmtime(self.lock_path)
+            except OSError:
+                return True
+            return time.time() - modified >= self.BREAK_GUARD_TIMEOUT
+
+        lock_age = time.time() - lock_data.get('acquired', 0)
+        if lock_age < self.window:
+            return False
+        if lock_age >= self.max_age:
+            return True
+
+        pid = lock_data.get('pid')
+        if pid is not None and _is_process_alive(pid):
+            return False
+
+        return True
+
+    def _break_stale_lock(self) -> bool:
+        try:
+            fd = os.open(self.guard_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            # Another process is clearing this lock. Clean up a guard left by a dead process.
+            try:
+                if time.time() - os.path.getmtime(self.guard_path) > self.BREAK_GUARD_TIMEOUT:
+                    self._remove(self.guard_path)
+            except OSError:
+                pass
+            return False
+
+        os.close(fd)
+        try:
+            # Check again now we hold the guard, the lock could have been replaced in between.
+            if not self._is_stale():
+                return False
+            logger.info(f'LaunchLock::_break_stale_lock() Clearing stale lock "{self.lock_path}"')
+            self._remove(self.lock_path)
+            return True
+        finally:
+            self._remove(self.guard_path)
+
+    def _read_lock(self) -> dict:
+        try:
+            with open(self.lock_path, 'r') as lock_file:
+                return json.load(lock_file)
+        except (OSError, ValueError):
+            return None
+
+    def _write_lock(self, lock_data: dict):
+        tmp_path = f'{self.lock_path}.{self.token}.tmp'
+        with open(tmp_path, 'w') as lock_file:
+            json.dump(lock_data, lock_file)
+        os.replace(tmp_path, self.lock_path)
+
+    def _remove(self, path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def _is_process_alive(pid: int) -> bool:
+    if pid == os.getpid():
+        return True
+
+    if sys.platform == 'win32':
+        # os.kill() would terminate the process on Windows, so query it through the win32 api.
+        import ctypes
+        PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+        STILL_ACTIVE = 259
+
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+        if not handle:
+            return False
+        try:
+            exit_code = ctypes.c_ulong()
+            if not kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code)):
+                return False
+            return exit_code.value == STILL_ACTIVE
+        finally:
+            kernel32.CloseHandle(handle)
+
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    except OSError:
+        return False
+    return True
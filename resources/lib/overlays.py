@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+#
+# Advanced Kodi Launcher: Retroarch launcher
+#
+# Copyright (c) Chrisism <crizizz@gmail.com>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; version 2 of the License.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# --- Python standard library ---
+from __future__ import unicode_literals
+from __future__ import division
+
+import os
+import re
+import hashlib
+import logging
+import typing
+
+logger = logging.getLogger(__name__)
+
+KEY_PATTERN = re.compile(r'^[A-Za-z0-9_]+$')
+# key=value or key="value", items separated by ';'. Quoted values may contain ';'.
+OVERRIDE_PATTERN = re.compile(r'\s*(?P<key>[^=;"]*?)\s*=\s*(?:"(?P<quoted>[^"]*)"|(?P<value>[^;"]*?))\s*(?:;|$)')
+
+
+# -------------------------------------------------------------------------------------------------
+# Retroarch config overlays.
+#
+# Overrides for a launcher or ROM are written as a small cfg file which is passed to Retroarch
+# with --appendconfig on top of the shared retroarch.cfg. The file name is the hash of the content
+# so launchers and ROMs with the same overrides share one file and a file is only written when
+# its content changes.
+# -------------------------------------------------------------------------------------------------
+def get_config_overlay(overlay_dir: str, overrides: typing.Dict[str, typing.Any]) -> str:
+    content = format_config(overrides)
+    content_hash = hashlib.sha1(content.encode('utf-8')).hexdigest()
+    overlay_path = os.path.join(overlay_dir, f'{content_hash}.cfg')
+    if os.path.exists(overlay_path):
+        return overlay_path
+
+    if not os.path.isdir(overlay_dir):
+        os.makedirs(overlay_dir, exist_ok=True)
+
+    logger.debug(f'get_config_overlay() Writing overlay "{overlay_path}"')
+    tmp_path = f'{overlay_path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as overlay_file:
+        overlay_file.write(content)
+    os.replace(tmp_path, overlay_path)
+    return overlay_path
+
+
+def format_config(overrides: typing.Dict[str, typing.Any]) -> str:
+    lines = []
+    for key in sorted(overrides.keys()):
+        value = _format_value(overrides[key])
+        if not is_valid_override(key, value):
+            logger.warning(f'format_config() Skipping invalid config override "{key}"')
+            continue
+        lines.append(f'{key} = "{value}"\n')
+    return ''.join(lines)
+
+
+#
+# Retroarch cfg files have no escaping, so keys are limited to word characters and values cannot
+# contain quotes or line breaks.
+#
+def is_valid_override(key: str, value: str) -> bool:
+    if KEY_PATTERN.match(key) is None:
+        return False
+    return not any(char in value for char in '"\r\n')
+
+
+def parse_overrides(text: str) -> typing.Dict[str, str]:
+    overrides = {}
+    if text is None:
+        return overrides
+
+    position = 0
+    while position < len(text):
+        match = OVERRIDE_PATTERN.match(text, position)
+        if match is None or match.end() == position:
+            end = text.find(';', position)
+            end = len(text) if end < 0 else end + 1
+            item = text[position:end].strip(' ;')
+            if item:
+                logger.warning(f'parse_overrides() Skipping invalid config override "{item}"')
+            position = end
+            continue
+
+        position = match.end()
+        key = match.group('key')
+        value = match.group('quoted') if match.group('quoted') is not None else match.group('value')
+        if not is_valid_override(key, value):
+            logger.warning(f'parse_overrides() Skipping invalid config override "{match.group(0).strip(" ;")}"')
+            continue
+        overrides[key] = value
+    return overrides
+
+
+def format_overrides(overrides: typing.Dict[str, typing.Any]) -> str:
+    items = []
+    for key, value in overrides.items():
+        value = _format_value(value)
+        if ';' in value or value != value.strip():
+            value = f'"{value}"'
+        items.append(f'{key}={value}')
+    return '; '.join(items)
+
+
+def _format_value(value) -> str:
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    return str(value)
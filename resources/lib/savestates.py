@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+#
+# Advanced Kodi Launcher: Retroarch launcher
+#
+# Copyright (c) Chrisism <crizizz@gmail.com>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; version 2 of the License.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# --- Python standard library ---
+from __future__ import unicode_literals
+from __future__ import division
+
+import os
+import re
+import json
+import logging
+import typing
+
+logger = logging.getLogger(__name__)
+
+# Slot number used for the automatic save state (<content>.state.auto)
+AUTO_SLOT = -1
+
+STATE_FILE_PATTERN = re.compile(r'^(?P<content>.+)\.state(?P<slot>\d*|\.auto)$')
+
+
+# -------------------------------------------------------------------------------------------------
+# Index of Retroarch save state files.
+#
+# Retroarch stores save states as <content>.state, <content>.stateN and <content>.state.auto.
+# The index keeps the file names per content name for every savestate directory and is stored
+# on disk so a launch does not need to list the directory. A directory is only scanned again
+# when its modification time changed, which happens when a slot file is added or removed.
+# -------------------------------------------------------------------------------------------------
+class SavestateIndex(object):
+
+    def __init__(self, index_path: str):
+        self.index_path = index_path
+        self.index = None
+        self.is_dirty = False
+
+    def find_latest(self, state_dirs: typing.List[str], content_name: str,
+                    exclude_slots: typing.Iterable[int] = ()) -> typing.Tuple[str, int]:
+        self._load()
+
+        latest_path = None
+        latest_slot = None
+        latest_mtime = None
+        for state_dir in state_dirs:
+            for file_name in self._get_state_files(state_dir, content_name):
+                if _get_slot(file_name) in exclude_slots:
+                    continue
+                state_path = os.path.join(state_dir, file_name)
+                try:
+                    mtime = os.path.getmtime(state_path)
+                except OSError:
+                    continue
+                if latest_mtime is None or mtime > latest_mtime:
+                    latest_path = state_path
+                    latest_slot = _get_slot(file_name)
+                    latest_mtime = mtime
+
+        self._save()
+        if latest_path is not None:
+            logger.debug(f'SavestateIndex::find_latest() Found "{latest_path}" (slot {latest_slot})')
+        return latest_path, latest_slot
+
+    def _get_state_files(self, state_dir: str, content_name: str) -> typing.List[str]:
+        try:
+            dir_mtime = os.path.getmtime(state_dir)
+        except OSError:
+            return []
+
+        entry = self.index.get(state_dir)
+        if entry is None or entry['mtime'] != dir_mtime:
+            states = self._scan(state_dir)
+            if states is None:
+                return []
+            entry = {'mtime': dir_mtime, 'states': states}
+            self.index[state_dir] = entry
+            self.is_dirty = True
+
+        return entry['states'].get(content_name, [])
+
+    def _scan(self, state_dir: str) -> typing.Optional[typing.Dict[str, typing.List[str]]]:
+        logger.debug(f'SavestateIndex::_scan() Indexing "{state_dir}"')
+        states = {}
+        try:
+            with os.scandir(state_dir) as entries:
+                for entry in entries:
+                    match = STATE_FILE_PATTERN.match(entry.name)
+                    if match is None or not entry.is_file():
+                        continue
+                    states.setdefault(match.group('content'), []).append(entry.name)
+        except OSError as ex:
+            logger.warning(f'SavestateIndex::_scan() Cannot read "{state_dir}"', exc_info=ex)
+            return None
+        return states
+
+    def _load(self):
+        if self.index is not None:
+            return
+        try:
+            with open(self.index_path, 'r') as index_file:
+                self.index = json.load(index_file)
+        except (OSError, ValueError):
+            self.index = {}
+
+    def _save(self):
+        if not self.is_dirty:
+            return
+        tmp_path = f'{self.index_path}.tmp'
+        try:
+            with open(tmp_path, 'w') as index_file:
+                json.dump(self.index, index_file)
+            os.replace(tmp_path, self.index_path)
+            self.is_dirty = False
+        except OSError as ex:
+            logger.warning(f'SavestateIndex::_save() Cannot write index "{self.index_path}"', exc_info=ex)
+
+
+def _get_slot(file_name: str) -> int:
+    slot = STATE_FILE_PATTERN.match(file_name).group('slot')
+    if slot == '.auto':
+        return AUTO_SLOT
+    if slot == '':
+        return 0
+    return int(slot)
@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+#
+# Advanced Kodi Launcher: Retroarch launcher
+#
+# Copyright (c) Chrisism <crizizz@gmail.com>
+#
+# This program is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; version 2 of the License.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# --- Python standard library ---
+from __future__ import unicode_literals
+from __future__ import division
+
+import os
+import re
+import sys
+import shutil
+import types
+import logging
+
+logger = logging.getLogger(__name__)
+
+ADDON_ID = 'script.akl.retroarchlauncher'
+ADDON_PATH = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+kodi_home = os.path.join(os.path.expanduser('~'), '.kodi')
+
+XBMC_MODULES = ['xbmc', 'xbmcaddon', 'xbmcgui', 'xbmcvfs', 'xbmcplugin']
+
+LOG_LEVELS = {
+    'LOGDEBUG': logging.DEBUG,
+    'LOGINFO': logging.INFO,
+    'LOGWARNING': logging.WARNING,
+    'LOGERROR': logging.ERROR,
+    'LOGFATAL': logging.CRITICAL,
+    'LOGNONE': logging.NOTSET
+}
+
+
+# -------------------------------------------------------------------------------------------------
+# Lightweight stand-in for the Kodi xbmc modules.
+#
+# Makes it possible to use the launcher and the AKL module outside of Kodi, for example from the
+# command line. Must be installed before akl is imported. Only the calls needed for file access,
+# addon info and logging do actual work, everything else (dialogs, notifications, builtins) is
+# silently ignored. Special paths are resolved against a Kodi home folder, default ~/.kodi.
+# -------------------------------------------------------------------------------------------------
+def install(home: str = None):
+    global kodi_home
+    if home is not None:
+        kodi_home = home
+
+    if isinstance(sys.modules.get('xbmc'), _StandInModule):
+        return
+
+    # Installed even when Kodistubs is available, since those stubs do not touch the filesystem.
+    for name in XBMC_MODULES:
+        module = _StandInModule(name)
+        module.__getattr__ = _get_standin_attr
+        sys.modules[name] = module
+
+    xbmc = sys.modules['xbmc']
+    for level_name, level in LOG_LEVELS.items():
+        setattr(xbmc, level_name, level)
+    xbmc.log = _log
+    xbmc.translatePath = translate_path
+    xbmc.getCondVisibility = _get_cond_visibility
+    xbmc.getInfoLabel = lambda label: ''
+    xbmc.sleep = lambda milliseconds: None
+
+    xbmcaddon = sys.modules['xbmcaddon']
+    xbmcaddon.Addon = _Addon
+
+    xbmcvfs = sys.modules['xbmcvfs']
+    xbmcvfs.translatePath = translate_path
+    xbmcvfs.File = _File
+    xbmcvfs.exists = lambda path: os.path.exists(translate_path(path))
+    xbmcvfs.mkdir = _mkdirs
+    xbmcvfs.mkdirs = _mkdirs
+    xbmcvfs.listdir = _listdir
+    xbmcvfs.delete = lambda path: _call(os.remove, translate_path(path))
+    xbmcvfs.rmdir = lambda path, force=False: _call(shutil.rmtree if force else os.rmdir, translate_path(path))
+    xbmcvfs.copy = lambda source, destination: _call(shutil.copyfile, translate_path(source), translate_path(destination))
+    xbmcvfs.rename = lambda source, destination: _call(os.rename, translate_path(source), translate_path(destination))
+
+
+def translate_path(path: str) -> str:
+    special_paths = {
+        'special://home/': '',
+        'special://xbmc/': '',
+        'special://masterprofile/': 'userdata/',
+        'special://profile/': 'userdata/',
+        'special://userdata/': 'userdata/',
+        'special://temp/': 'temp/',
+        'special://logpath/': 'temp/'
+    }
+    for special_path, sub_path in special_paths.items():
+        if path.startswith(special_path):
+            return os.path.join(kodi_home, sub_path, path[len(special_path):])
+    return path
+
+
+class _StandInModule(types.ModuleType):
+    pass
+
+
+class _StandIn(object):
+
+    def __call__(self, *args, **kwargs):
+        return _StandIn()
+
+    def __getattr__(self, attr):
+        return _get_standin_attr(attr)
+
+    def __bool__(self):
+        return False
+
+    def __str__(self):
+        return ''
+
+
+class _Addon(_StandIn):
+
+    def __init__(self, id: str = None):
+        self.id = id if id is not None else ADDON_ID
+
+    def __bool__(self):
+        return True
+
+    def getAddonInfo(self, key: str) -> str:
+        if key == 'id':
+            return self.id
+        if key == 'path':
+            return ADDON_PATH
+        if key == 'profile':
+            return f'special://profile/addon_data/{self.id}/'
+        if key == 'version':
+            return self._get_version()
+        return ''
+
+    def getSetting(self, key: str) -> str:
+        return os.environ.get(f'AKL_SETTING_{key.upper()}', '')
+
+    def getSettingBool(self, key: str) -> bool:
+        return self.getSetting(key).lower() == 'true'
+
+    def getSettingInt(self, key: str) -> int:
+        setting = self.getSetting(key)
+        return int(setting) if setting else 0
+
+    def getLocalizedString(self, id: int) -> str:
+        return ''
+
+    def _get_version(self) -> str:
+        try:
+            with open(os.path.join(ADDON_PATH, 'addon.xml'), 'r', encoding='utf-8') as addon_file:
+                match = re.search(r'<addon[^>]+version="([^"]+)"', addon_file.read())
+            return match.group(1) if match else ''
+        except OSError:
+            return ''
+
+
+class _File(object):
+
+    def __init__(self, path: str, mode: str = ''):
+        file_mode = 'wb' if mode == 'w' else 'rb'
+        self.file = open(translate_path(path), file_mode)
+
+    def read(self, *args) -> str:
+        return self.file.read(*args).decode('utf-8')
+
+    def readBytes(self, *args) -> bytearray:
+        return bytearray(self.file.read(*args))
+
+    def write(self, data) -> bool:
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        self.file.write(data)
+        return True
+
+    def size(self) -> int:
+        return os.fstat(self.file.fileno()).st_size
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def _get_standin_attr(attr: str):
+    if attr.startswith('__'):
+        raise AttributeError(attr)
+    return _StandIn()
+
+
+def _get_cond_visibility(condition: str) -> bool:
+    platforms = {
+        'system.platform.windows': sys.platform == 'win32',
+        'system.platform.osx': sys.platform == 'darwin',
+        'system.platform.darwin': sys.platform == 'darwin',
+        'system.platform.linux': sys.platform.startswith('linux'),
+        'system.platform.android': False
+    }
+    return platforms.get(condition.lower(), False)
+
+
+def _log(msg: str, level: int = logging.DEBUG):
+    logger.log(level, msg)
+
+
+def _mkdirs(path: str) -> bool:
+    os.makedirs(translate_path(path), exist_ok=True)
+    return True
+
+
+def _listdir(path: str):
+    path = translate_path(path)
+    dirs = []
+    files = []
+    for name in os.listdir(path):
+        if os.path.isdir(os.path.join(path, name)):
+            dirs.append(name)
+        else:
+            files.append(name)
+    return dirs, files
+
+
+def _call(func, *args) -> bool:
+    try:
+        func(*args)
+        return True
+    except OSError:
+        return False
@@ -0,0 +1,158 @@
+import unittest, os
+import sys
+import json
+import tempfile
+import subprocess
+import unittest.mock
+
+import logging
+
+logging.basicConfig(format = '%(asctime)s %(module)s %(levelname)s: %(message)s',
+                datefmt = '%m/%d/%Y %I:%M:%S %p', level = logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+from fakes import random_string
+
+ADDON_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class Test_CLI(unittest.TestCase):
+
+    def setUp(self):
+        self.kodi_home = tempfile.mkdtemp()
+        self.retroarch_dir = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.retroarch_dir, 'info'))
+        os.makedirs(os.path.join(self.retroarch_dir, 'cores'))
+
+        self.retro_config = os.path.join(self.retroarch_dir, 'retroarch.cfg')
+        with open(self.retro_config, 'w') as config_file:
+            config_file.write(f'libretro_info_path = "{os.path.join(self.retroarch_dir, "info")}"\n')
+            config_file.write(f'libretro_directory = "{os.path.join(self.retroarch_dir, "cores")}"\n')
+
+        with open(os.path.join(self.retroarch_dir, 'info', 'snes9x_libretro.info'), 'w') as info_file:
+            info_file.write('display_name = "Nintendo - SNES / SFC (Snes9x - Current)"\n')
+            info_file.write('corename = "Snes9x"\n')
+            info_file.write('systemname = "Super Nintendo Entertainment System"\n')
+            info_file.write('manufacturer = "Nintendo"\n')
+            info_file.write('supported_extensions = "smc|sfc|swc|fig|bs|st"\n')
+
+        cores_ext = 'dll' if sys.platform == 'win32' else 'so'
+        self.retro_core = os.path.join(self.retroarch_dir, 'cores', f'snes9x_libretro.{cores_ext}')
+        with open(self.retro_core, 'w') as core_file:
+            core_file.write('')
+
+    def _run_cli(self, *args, input=None):
+        process = subprocess.run([sys.executable, '-m', 'resources.lib.cli', '--kodi-home', self.kodi_home] + list(args),
+                                 cwd=ADDON_DIR, input=input, capture_output=True, text=True)
+        logger.debug(process.stderr)
+        return process.returncode, json.loads(process.stdout)
+
+    def test_listing_cores_returns_core_metadata(self):
+        # act
+        actual_code, actual = self._run_cli('cores', '--config', self.retro_config)
+
+        # assert
+        self.assertEqual(0, actual_code)
+        self.assertEqual(1, len(actual))
+        self.assertEqual(self.retro_config, actual[0]['config'])
+        self.assertEqual(1, len(actual[0]['cores']))
+
+        actual_core = actual[0]['cores'][0]
+        self.assertEqual('Nintendo - SNES / SFC (Snes9x - Current)', actual_core['display_name'])
+        self.assertEqual('Super Nintendo Entertainment System', actual_core['systemname'])
+        self.assertEqual('smc|sfc|swc|fig|bs|st', actual_core['supported_extensions'])
+        self.assertEqual(self.retro_core, actual_core['core'])
+
+    def test_listing_configs_returns_config_files(self):
+        # act
+        actual_code, actual = self._run_cli('configs', '--application', self.retroarch_dir)
+
+        # assert
+        self.assertEqual(0, actual_code)
+        self.assertListEqual([self.retro_config], actual[0]['configs'])
+
+    @unittest.skipUnless(sys.platform.startswith('linux'), 'home folder expansion on linux only')
+    def test_resolving_commands_expands_home_folder(self):
+        # arrange
+        launchers = [{
+            'id': random_string(5),
+            'settings': {
+                'application': '~/retroarch/',
+                'retro_config': '~/retroarch/retroarch.cfg',
+                'retro_core': '~/retroarch/cores/snes9x_libretro.so',
+                'args': '',
+                'args_extra': None
+            },
+            'roms': [{'id': random_string(5), 'file': '~/roms/superrom.zip'}]
+        }]
+
+        # act
+        with unittest.mock.patch.dict(os.environ, {'HOME': '/home/tester'}):
+            actual_code, actual = self._run_cli('command', '--launchers', '-', input=json.dumps(launchers))
+
+        # assert
+        self.assertEqual(0, actual_code)
+        self.assertListEqual(['-L', '/home/tester/retroarch/cores/snes9x_libretro.so',
+                              '-c', '/home/tester/retroarch/retroarch.cfg',
+                              '/home/tester/roms/superrom.zip'], actual[0]['arguments'])
+
+    @unittest.skipUnless(sys.platform == 'win32' or sys.platform.startswith('linux'), 'desktop arguments only')
+    def test_resolving_commands_applies_addon_settings_like_a_launch(self):
+        # arrange
+        launchers = [{
+            'id': random_string(5),
+            'settings': {
+                'application': self.retroarch_dir,
+                'retro_config': self.retro_config,
+                'retro_core': self.retro_core,
+                'args': '',
+                'args_extra': None
+            },
+            'roms': [{'id': random_string(5), 'file': "/roms/snes/super'rom.zip"}]
+        }]
+
+        # act
+        _, actual_plain = self._run_cli('command', '--launchers', '-', input=json.dumps(launchers))
+        with unittest.mock.patch.dict(os.environ, {'AKL_SETTING_ESCAPE_ROMFILE': 'true'}):
+            actual_code, actual_escaped = self._run_cli('command', '--launchers', '-', input=json.dumps(launchers))
+
+        # assert
+        self.assertEqual(0, actual_code)
+        self.assertEqual("/roms/snes/super'rom.zip", actual_plain[0]['arguments'][-1])
+        self.assertNotEqual(actual_plain[0]['arguments'][-1], actual_escaped[0]['arguments'][-1])
+
+    @unittest.skipUnless(sys.platform == 'win32' or sys.platform.startswith('linux'), 'desktop arguments only')
+    def test_resolving_commands_for_multiple_launchers_and_roms(self):
+        # arrange
+        launchers = []
+        for _ in range(3):
+            launchers.append({
+                'id': random_string(5),
+                'settings': {
+                    'application': self.retroarch_dir,
+                    'retro_config': self.retro_config,
+                    'retro_core': self.retro_core,
+                    'args': '',
+                    'args_extra': None,
+                    'config_overrides': {'video_smooth': 'true'}
+                },
+                'roms': [
+                    {'id': random_string(5), 'file': '/roms/snes/superrom.zip'},
+                    {'id': random_string(5), 'file': '/roms/snes/otherrom.zip'}
+                ]
+            })
+
+        # act
+        actual_code, actual = self._run_cli('command', '--launchers', '-', input=json.dumps(launchers))
+
+        # assert
+        self.assertEqual(0, actual_code)
+        self.assertEqual(6, len(actual))
+        self.assertEqual(1, len(set(result['arguments'][5] for result in actual)))
+
+        actual_result = actual[1]
+        self.assertEqual(launchers[0]['id'], actual_result['launcher'])
+        self.assertListEqual(['-L', self.retro_core, '-c', self.retro_config, '--appendconfig'], actual_result['arguments'][:5])
+        self.assertEqual('/roms/snes/otherrom.zip', actual_result['arguments'][6])
+
+if __name__ == '__main__':
+   unittest.main()
@@ -1,4 +1,6 @@
 import unittest, os
+import time
+import tempfile
 import unittest.mock
 from unittest.mock import MagicMock, patch
 
@@ -88,6 +90,294 @@ class Test_Launcher(unittest.TestCase):
         self.assertDictEqual(expectedKwargs, actualKwargs)
         
 
+    @patch('resources.lib.launcher.io.is_windows')
+    @patch('resources.lib.launcher.io.is_android')
+    @patch('resources.lib.launcher.io.is_linux')
+    @patch('resources.lib.launcher.SavestateIndex')
+    @patch('resources.lib.launcher.RetroarchLauncher._get_savestate_folder')
+    @patch('resources.lib.launcher.kodi', autospec=True)
+    @patch('akl.launchers.kodi', autospec=True)
+    @patch('akl.utils.io.FileName', side_effect = FakeFile)
+    @patch('akl.api.client_get_rom')
+    @patch('akl.api.client_get_launcher_settings')
+    @patch('akl.executors.ExecutorFactory')
+    def test_if_retroarch_launcher_will_resume_from_latest_savestate_slot(self, 
+            factory_mock:MagicMock, api_settings_mock:MagicMock, api_rom_mock: MagicMock, filename_mock, kodi_mock,
+            launcher_kodi_mock, savestate_folder_mock:MagicMock, index_mock:MagicMock,
+            is_linux_mock:MagicMock,is_android_mock:MagicMock, is_win_mock:MagicMock):
+        
+        # arrange
+        is_linux_mock.return_value = True
+        is_win_mock.return_value = False
+        is_android_mock.return_value = False
+        
+        launcher_settings = {}
+        launcher_settings['id'] = 'ABC'
+        launcher_settings['toggle_window'] = True
+        launcher_settings['romext'] = None
+        launcher_settings['args_extra'] = None
+        launcher_settings['roms_base_noext'] = 'snes'
+        launcher_settings['retro_core'] = '/home/user/.config/retroarch/cores/snes9x_libretro.so'
+        launcher_settings['retro_config'] = '/home/user/.config/retroarch/retroarch.cfg'
+        launcher_settings['application'] = '/usr/bin/retroarch'
+        launcher_settings['quick_resume'] = True
+        api_settings_mock.return_value = launcher_settings
+
+        mock = FakeExecutor()
+        factory_mock.create.return_value = mock
+        
+        rom = ROMObj({
+            'id': random_string(10),
+            'm_name': 'TestCase',
+            'scanned_data': {'file': 'superrom.zip'}
+        })
+        api_rom_mock.return_value = rom
+        savestate_folder_mock.return_value = FakeFile('/home/user/.config/retroarch/states/')
+        launcher_kodi_mock.getAddonDir.return_value = FakeFile('/addon_data/')
+        index_mock.return_value.find_latest.return_value = ('/home/user/.config/retroarch/states/superrom.state2', 2)
+
+        expectedArgs = [
+            '-L', '/home/user/.config/retroarch/cores/snes9x_libretro.so',
+            '-c', '/home/user/.config/retroarch/retroarch.cfg',
+            '-e', '2',
+            'superrom.zip'
+        ]
+        
+        # act
+        target = RetroarchLauncher(random_string(10), None, 'localhost', 8080, factory_mock, ExecutionSettings())
+        target.launch()
+
+        # assert
+        index_mock.return_value.find_latest.assert_called_with(['/home/user/.config/retroarch/states/'], 'superrom', exclude_slots=[0])
+        self.assertListEqual(expectedArgs, mock.actualArgs)
+        api_rom_mock.assert_called_once()
+
+    @patch('resources.lib.launcher.io.is_windows')
+    @patch('resources.lib.launcher.io.is_android')
+    @patch('resources.lib.launcher.io.is_linux')
+    @patch('resources.lib.launcher.RetroarchLauncher._get_savestate_folder')
+    @patch('resources.lib.launcher.kodi', autospec=True)
+    @patch('akl.launchers.kodi', autospec=True)
+    @patch('akl.utils.io.FileName', side_effect = FakeFile)
+    @patch('akl.api.client_get_rom')
+    @patch('akl.api.client_get_launcher_settings')
+    @patch('akl.executors.ExecutorFactory')
+    def test_if_retroarch_launcher_will_skip_default_slot_when_resuming(self, 
+            factory_mock:MagicMock, api_settings_mock:MagicMock, api_rom_mock: MagicMock, filename_mock, kodi_mock,
+            launcher_kodi_mock, savestate_folder_mock:MagicMock,
+            is_linux_mock:MagicMock,is_android_mock:MagicMock, is_win_mock:MagicMock):
+        
+        # arrange
+        state_dir = tempfile.mkdtemp()
+        for file_name, age in [('superrom.state', 0), ('superrom.state2', 100)]:
+            state_path = os.path.join(state_dir, file_name)
+            with open(state_path, 'w') as state_file:
+                state_file.write('state')
+            os.utime(state_path, (time.time() - age, time.time() - age))
+
+        is_linux_mock.return_value = True
+        is_win_mock.return_value = False
+        is_android_mock.return_value = False
+        
+        launcher_settings = {}
+        launcher_settings['id'] = 'ABC'
+        launcher_settings['toggle_window'] = True
+        launcher_settings['romext'] = None
+        launcher_settings['args_extra'] = None
+        launcher_settings['roms_base_noext'] = 'snes'
+        launcher_settings['retro_core'] = '/home/user/.config/retroarch/cores/snes9x_libretro.so'
+        launcher_settings['retro_config'] = '/home/user/.config/retroarch/retroarch.cfg'
+        launcher_settings['application'] = '/usr/bin/retroarch'
+        launcher_settings['quick_resume'] = True
+        api_settings_mock.return_value = launcher_settings
+
+        mock = FakeExecutor()
+        factory_mock.create.return_value = mock
+        
+        api_rom_mock.return_value = ROMObj({
+            'id': random_string(10),
+            'm_name': 'TestCase',
+            'scanned_data': {'file': 'superrom.zip'}
+        })
+        savestate_folder_mock.return_value = FakeFile(state_dir)
+        launcher_kodi_mock.getAddonDir.return_value = FakeFile(tempfile.mkdtemp())
+
+        expectedArgs = [
+            '-L', '/home/user/.config/retroarch/cores/snes9x_libretro.so',
+            '-c', '/home/user/.config/retroarch/retroarch.cfg',
+            '-e', '2',
+            'superrom.zip'
+        ]
+        
+        # act
+        target = RetroarchLauncher(random_string(10), None, 'localhost', 8080, factory_mock, ExecutionSettings())
+        target.launch()
+
+        # assert
+        self.assertListEqual(expectedArgs, mock.actualArgs)
+
+    @patch('resources.lib.launcher.io.is_windows')
+    @patch('resources.lib.launcher.io.is_android')
+    @patch('resources.lib.launcher.io.is_linux')
+    @patch('resources.lib.launcher.RetroarchLauncher._get_savestate_folder')
+    @patch('resources.lib.launcher.kodi', autospec=True)
+    @patch('akl.launchers.kodi', autospec=True)
+    @patch('akl.utils.io.FileName', side_effect = FakeFile)
+    @patch('akl.api.client_get_rom')
+    @patch('akl.api.client_get_launcher_settings')
+    @patch('akl.executors.ExecutorFactory')
+    def test_if_retroarch_launcher_will_launch_normally_when_savestate_folder_is_unreadable(self, 
+            factory_mock:MagicMock, api_settings_mock:MagicMock, api_rom_mock: MagicMock, filename_mock, kodi_mock,
+            launcher_kodi_mock, savestate_folder_mock:MagicMock,
+            is_linux_mock:MagicMock,is_android_mock:MagicMock, is_win_mock:MagicMock):
+        
+        # arrange
+        not_a_dir = os.path.join(tempfile.mkdtemp(), 'states')
+        with open(not_a_dir, 'w') as state_file:
+            state_file.write('')
+
+        is_linux_mock.return_value = True
+        is_win_mock.return_value = False
+        is_android_mock.return_value = False
+        
+        launcher_settings = {}
+        launcher_settings['id'] = 'ABC'
+        launcher_settings['toggle_window'] = True
+        launcher_settings['romext'] = None
+        launcher_settings['args_extra'] = None
+        launcher_settings['roms_base_noext'] = 'snes'
+        launcher_settings['retro_core'] = '/home/user/.config/retroarch/cores/snes9x_libretro.so'
+        launcher_settings['retro_config'] = '/home/user/.config/retroarch/retroarch.cfg'
+        launcher_settings['application'] = '/usr/bin/retroarch'
+        launcher_settings['quick_resume'] = True
+        api_settings_mock.return_value = launcher_settings
+
+        mock = FakeExecutor()
+        factory_mock.create.return_value = mock
+        
+        api_rom_mock.return_value = ROMObj({
+            'id': random_string(10),
+            'm_name': 'TestCase',
+            'scanned_data': {'file': 'superrom.zip'}
+        })
+        savestate_folder_mock.return_value = FakeFile(not_a_dir)
+        launcher_kodi_mock.getAddonDir.return_value = FakeFile(tempfile.mkdtemp())
+
+        expectedArgs = [
+            '-L', '/home/user/.config/retroarch/cores/snes9x_libretro.so',
+            '-c', '/home/user/.config/retroarch/retroarch.cfg',
+            'superrom.zip'
+        ]
+        
+        # act
+        target = RetroarchLauncher(random_string(10), None, 'localhost', 8080, factory_mock, ExecutionSettings())
+        target.launch()
+
+        # assert
+        self.assertListEqual(expectedArgs, mock.actualArgs)
+
+    @patch('resources.lib.launcher.RetroarchLauncher._get_retroarch_configuration')
+    @patch('akl.api.client_get_launcher_settings')
+    def test_savestate_folder_without_core_info_is_not_sorted_by_core(self, api_settings_mock:MagicMock, configuration_mock:MagicMock):
+        # arrange
+        launcher_settings = {}
+        launcher_settings['id'] = 'ABC'
+        launcher_settings['retro_config'] = '/home/tester/.config/retroarch/retroarch.cfg'
+        api_settings_mock.return_value = launcher_settings
+        configuration_mock.return_value = {
+            'savestate_directory': '/home/tester/.config/retroarch/states',
+            'sort_savestates_enable': 'true'
+        }
+
+        target = RetroarchLauncher(None, random_string(5), None, 0, None, None)
+        target.launcher_settings.update(launcher_settings)
+
+        # act
+        actual = target._get_savestate_folder(io.FileName('/roms/snes/superrom.zip'))
+
+        # assert
+        self.assertEqual('/home/tester/.config/retroarch/states', os.path.normpath(actual.getPath()))
+
+    @patch('resources.lib.launcher.RetroarchLauncher._get_retroarch_configuration')
+    @patch('akl.api.client_get_launcher_settings')
+    def test_savestate_folder_expands_home_directory(self, api_settings_mock:MagicMock, configuration_mock:MagicMock):
+        # arrange
+        launcher_settings = {}
+        launcher_settings['id'] = 'ABC'
+        launcher_settings['retro_config'] = '/home/tester/.config/retroarch/retroarch.cfg'
+        api_settings_mock.return_value = launcher_settings
+        configuration_mock.return_value = {'savestate_directory': '~/.config/retroarch/states'}
+
+        target = RetroarchLauncher(None, random_string(5), None, 0, None, None)
+        target.launcher_settings.update(launcher_settings)
+
+        # act
+        with patch.dict(os.environ, {'HOME': '/home/tester'}):
+            actual = target._get_savestate_folder(io.FileName('/roms/snes/superrom.zip'))
+
+        # assert
+        self.assertEqual('/home/tester/.config/retroarch/states', os.path.normpath(actual.getPath()))
+
+    @patch('resources.lib.launcher.io.is_windows')
+    @patch('resources.lib.launcher.io.is_android')
+    @patch('resources.lib.launcher.io.is_linux')
+    @patch('resources.lib.launcher.kodi', autospec=True)
+    @patch('akl.launchers.kodi', autospec=True)
+    @patch('akl.utils.io.FileName', side_effect = FakeFile)
+    @patch('akl.api.client_get_rom')
+    @patch('akl.api.client_get_launcher_settings')
+    @patch('akl.executors.ExecutorFactory')
+    def test_if_retroarch_launcher_will_append_config_overlay_with_launcher_and_rom_overrides(self, 
+            factory_mock:MagicMock, api_settings_mock:MagicMock, api_rom_mock: MagicMock, filename_mock, kodi_mock,
+            launcher_kodi_mock, is_linux_mock:MagicMock,is_android_mock:MagicMock, is_win_mock:MagicMock):
+        
+        # arrange
+        rom_id = random_string(10)
+        addon_dir = tempfile.mkdtemp()
+
+        is_linux_mock.return_value = True
+        is_win_mock.return_value = False
+        is_android_mock.return_value = False
+        
+        launcher_settings = {}
+        launcher_settings['id'] = 'ABC'
+        launcher_settings['toggle_window'] = True
+        launcher_settings['romext'] = None
+        launcher_settings['args_extra'] = None
+        launcher_settings['roms_base_noext'] = 'snes'
+        launcher_settings['retro_core'] = '/home/user/.config/retroarch/cores/snes9x_libretro.so'
+        launcher_settings['retro_config'] = '/home/user/.config/retroarch/retroarch.cfg'
+        launcher_settings['application'] = '/usr/bin/retroarch'
+        launcher_settings['config_overrides'] = {'video_smooth': 'true', 'video_shader_enable': 'true'}
+        launcher_settings['rom_config_overrides'] = {'superrom': {'video_shader_enable': 'false'}}
+        api_settings_mock.return_value = launcher_settings
+
+        mock = FakeExecutor()
+        factory_mock.create.return_value = mock
+        
+        api_rom_mock.return_value = ROMObj({
+            'id': rom_id,
+            'm_name': 'TestCase',
+            'scanned_data': {'file': 'superrom.zip'}
+        })
+        launcher_kodi_mock.getAddonDir.return_value = FakeFile(addon_dir)
+
+        expectedOverlay = 'video_shader_enable = "false"\nvideo_smooth = "true"\n'
+        
+        # act
+        target = RetroarchLauncher(random_string(10), rom_id, 'localhost', 8080, factory_mock, ExecutionSettings())
+        target.launch()
+
+        # assert
+        actualArgs = mock.actualArgs
+        self.assertListEqual(['-L', launcher_settings['retro_core'], '-c', launcher_settings['retro_config']], actualArgs[:4])
+        self.assertEqual('--appendconfig', actualArgs[4])
+        self.assertEqual('superrom.zip', actualArgs[6])
+        self.assertTrue(actualArgs[5].startswith(os.path.join(addon_dir, 'overlays')))
+        with open(actualArgs[5], 'r') as overlay_file:
+            self.assertEqual(expectedOverlay, overlay_file.read())
+        api_rom_mock.assert_called_once()
+
     @patch('resources.lib.launcher.io.is_android')
     @patch('akl.api.client_get_launcher_settings')
     def test_retroarchlauncher_switching_core_to_info_file(self, api_settings_mock:MagicMock, is_android_mock:MagicMock):
@@ -0,0 +1,205 @@
+import unittest, os
+import json
+import time
+import tempfile
+import multiprocessing
+
+import logging
+
+logging.basicConfig(format = '%(asctime)s %(module)s %(levelname)s: %(message)s',
+                datefmt = '%m/%d/%Y %I:%M:%S %p', level = logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+from fakes import FakeExecutor, random_string
+
+from resources.lib.launchlock import LaunchLock
+
+def launch_with_lock(lock_dir, launcher_id, rom_id, barrier, results):
+    lock = LaunchLock(lock_dir, launcher_id, rom_id, 5)
+    executor = FakeExecutor()
+
+    barrier.wait()
+    if not lock.acquire():
+        results.put(None)
+        return
+    try:
+        executor.execute('retroarch', '-L', 'core.so', 'superrom.zip')
+        time.sleep(0.5)
+    finally:
+        lock.release()
+    results.put(executor.getActualApplication())
+
+class Test_LaunchLock(unittest.TestCase):
+
+    def setUp(self):
+        self.lock_dir = tempfile.mkdtemp()
+
+    def _write_lock(self, launcher_id, rom_id, pid, acquired):
+        lock = LaunchLock(self.lock_dir, launcher_id, rom_id)
+        with open(lock.lock_path, 'w') as lock_file:
+            json.dump({'pid': pid, 'token': random_string(10), 'acquired': acquired}, lock_file)
+
+    def test_concurrent_launches_of_same_rom_will_only_execute_once(self):
+        # arrange
+        launcher_id = random_string(10)
+        rom_id = random_string(10)
+        amount = 5
+
+        ctx = multiprocessing.get_context('spawn')
+        barrier = ctx.Barrier(amount)
+        results = ctx.Queue()
+        processes = [ctx.Process(target=launch_with_lock, args=(self.lock_dir, launcher_id, rom_id, barrier, results))
+                     for _ in range(amount)]
+
+        # act
+        for process in processes:
+            process.start()
+        actual = [results.get(timeout=30) for _ in range(amount)]
+        for process in processes:
+            process.join()
+
+        # assert
+        executed = [app for app in actual if app is not None]
+        self.assertEqual(1, len(executed))
+        self.assertEqual('retroarch', executed[0])
+
+    def test_launches_of_different_roms_will_not_block_each_other(self):
+        # arrange
+        launcher_id = random_string(10)
+        target_a = LaunchLock(self.lock_dir, launcher_id, random_string(10))
+        target_b = LaunchLock(self.lock_dir, launcher_id, random_string(10))
+
+        # act
+        actual_a = target_a.acquire()
+        actual_b = target_b.acquire()
+
+        # assert
+        self.assertTrue(actual_a)
+        self.assertTrue(actual_b)
+
+    def test_repeated_launch_within_window_is_ignored_after_release(self):
+        # arrange
+        launcher_id = random_string(10)
+        rom_id = random_string(10)
+        first = LaunchLock(self.lock_dir, launcher_id, rom_id, 5)
+        target = LaunchLock(self.lock_dir, launcher_id, rom_id, 5)
+
+        # act
+        first.acquire()
+        first.release()
+        actual = target.acquire()
+
+        # assert
+        self.assertFalse(actual)
+
+    def test_lock_can_be_acquired_again_after_window_and_release(self):
+        # arrange
+        launcher_id = random_string(10)
+        rom_id = random_string(10)
+        first = LaunchLock(self.lock_dir, launcher_id, rom_id, 0)
+        target = LaunchLock(self.lock_dir, launcher_id, rom_id, 0)
+
+        # act
+        first.acquire()
+        first.release()
+        actual = target.acquire()
+
+        # assert
+        self.assertTrue(actual)
+
+    def test_stale_lock_of_dead_process_is_cleared(self):
+        # arrange
+        launcher_id = random_string(10)
+        rom_id = random_string(10)
+
+        ctx = multiprocessing.get_context('spawn')
+        dead_process = ctx.Process(target=time.sleep, args=(0,))
+        dead_process.start()
+        dead_process.join()
+        self._write_lock(launcher_id, rom_id, dead_process.pid, time.time() - 60)
+
+        target = LaunchLock(self.lock_dir, launcher_id, rom_id, 5)
+
+        # act
+        actual = target.acquire()
+
+        # assert
+        self.assertTrue(actual)
+
+    def test_lock_of_dead_process_within_window_is_not_cleared(self):
+        # arrange
+        launcher_id = random_string(10)
+        rom_id = random_string(10)
+
+        ctx = multiprocessing.get_context('spawn')
+        dead_process = ctx.Process(target=time.sleep, args=(0,))
+        dead_process.start()
+        dead_process.join()
+        self._write_lock(launcher_id, rom_id, dead_process.pid, time.time())
+
+        target = LaunchLock(self.lock_dir, launcher_id, rom_id, 5)
+
+        # act
+        actual = target.acquire()
+
+        # assert
+        self.assertFalse(actual)
+
+    def test_lock_of_running_process_is_not_cleared_after_window(self):
+        # arrange
+        launcher_id = random_string(10)
+        rom_id = random_string(10)
+        self._write_lock(launcher_id, rom_id, os.getpid(), time.time() - 60)
+
+        target = LaunchLock(self.lock_dir, launcher_id, rom_id, 5)
+
+        # act
+        actual = target.acquire()
+
+        # assert
+        self.assertFalse(actual)
+
+    def test_lock_of_running_process_is_cleared_after_max_age(self):
+        # arrange
+        launcher_id = random_string(10)
+        rom_id = random_string(10)
+        self._write_lock(launcher_id, rom_id, os.getpid(), time.time() - LaunchLock.MAX_AGE - 1)
+
+        target = LaunchLock(self.lock_dir, launcher_id, rom_id, 5)
+
+        # act
+        actual = target.acquire()
+
+        # assert
+        self.assertTrue(actual)
+
+    def test_lock_still_being_written_is_not_cleared_with_zero_window(self):
+        # arrange
+        launcher_id = random_string(10)
+        rom_id = random_string(10)
+        target = LaunchLock(self.lock_dir, launcher_id, rom_id, 0)
+        open(target.lock_path, 'w').close()
+
+        # act
+        actual = target.acquire()
+
+        # assert
+        self.assertFalse(actual)
+
+    def test_empty_lock_is_cleared_after_grace_period(self):
+        # arrange
+        launcher_id = random_string(10)
+        rom_id = random_string(10)
+        target = LaunchLock(self.lock_dir, launcher_id, rom_id, 0)
+        open(target.lock_path, 'w').close()
+        modified = time.time() - LaunchLock.BREAK_GUARD_TIMEOUT - 1
+        os.utime(target.lock_path, (modified, modified))
+
+        # act
+        actual = target.acquire()
+
+        # assert
+        self.assertTrue(actual)
+
+if __name__ == '__main__':
+   unittest.main()
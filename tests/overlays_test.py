@@ -0,0 +1,91 @@
+import unittest, os
+import tempfile
+from unittest.mock import patch
+
+import logging
+
+logging.basicConfig(format = '%(asctime)s %(module)s %(levelname)s: %(message)s',
+                datefmt = '%m/%d/%Y %I:%M:%S %p', level = logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+from resources.lib import overlays
+
+class Test_Overlays(unittest.TestCase):
+
+    def setUp(self):
+        self.overlay_dir = os.path.join(tempfile.mkdtemp(), 'overlays')
+
+    def test_overlay_contains_overrides_in_retroarch_format(self):
+        # arrange
+        expected = 'savestate_auto_load = "true"\nvideo_shader_enable = "false"\nvideo_smooth = "1"\n'
+
+        # act
+        actual_path = overlays.get_config_overlay(self.overlay_dir, {
+            'video_smooth': 1,
+            'savestate_auto_load': True,
+            'video_shader_enable': 'false'
+        })
+
+        # assert
+        with open(actual_path, 'r', encoding='utf-8') as overlay_file:
+            actual = overlay_file.read()
+        self.assertEqual(expected, actual)
+
+    def test_same_overrides_share_one_overlay(self):
+        # act
+        actual_a = overlays.get_config_overlay(self.overlay_dir, {'video_smooth': 'true', 'input_overlay_enable': 'false'})
+        actual_b = overlays.get_config_overlay(self.overlay_dir, {'input_overlay_enable': 'false', 'video_smooth': 'true'})
+        actual_c = overlays.get_config_overlay(self.overlay_dir, {'video_smooth': 'false'})
+
+        # assert
+        self.assertEqual(actual_a, actual_b)
+        self.assertNotEqual(actual_a, actual_c)
+        self.assertEqual(2, len(os.listdir(self.overlay_dir)))
+
+    def test_existing_overlay_is_not_written_again(self):
+        # arrange
+        overlays.get_config_overlay(self.overlay_dir, {'video_smooth': 'true'})
+
+        # act
+        with patch('resources.lib.overlays.os.replace') as replace_mock:
+            overlays.get_config_overlay(self.overlay_dir, {'video_smooth': 'true'})
+
+        # assert
+        replace_mock.assert_not_called()
+
+    def test_overrides_text_can_be_parsed_and_formatted(self):
+        # arrange
+        text = 'video_smooth = "true"; input_overlay_enable=false;invalid; =empty'
+
+        # act
+        with self.assertLogs('resources.lib.overlays', level='WARNING') as logs:
+            actual = overlays.parse_overrides(text)
+
+        # assert
+        self.assertDictEqual({'video_smooth': 'true', 'input_overlay_enable': 'false'}, actual)
+        self.assertEqual('video_smooth=true; input_overlay_enable=false', overlays.format_overrides(actual))
+        self.assertEqual(2, len(logs.output))
+
+    def test_quoted_values_can_contain_separators(self):
+        # arrange
+        text = 'video_filter="a;b"; video_smooth=true'
+
+        # act
+        actual = overlays.parse_overrides(text)
+
+        # assert
+        self.assertDictEqual({'video_filter': 'a;b', 'video_smooth': 'true'}, actual)
+        self.assertDictEqual(actual, overlays.parse_overrides(overlays.format_overrides(actual)))
+
+    def test_values_with_quotes_are_rejected(self):
+        # act
+        with self.assertLogs('resources.lib.overlays', level='WARNING'):
+            actual_parsed = overlays.parse_overrides('video_filter=he said "hi"; video_smooth=true')
+            actual_config = overlays.format_config({'video_filter': 'he said "hi"', 'video_smooth': 'true'})
+
+        # assert
+        self.assertDictEqual({'video_smooth': 'true'}, actual_parsed)
+        self.assertEqual('video_smooth = "true"\n', actual_config)
+
+if __name__ == '__main__':
+   unittest.main()
@@ -0,0 +1,131 @@
+import unittest, os
+import time
+import tempfile
+from unittest.mock import patch
+
+import logging
+
+logging.basicConfig(format = '%(asctime)s %(module)s %(levelname)s: %(message)s',
+                datefmt = '%m/%d/%Y %I:%M:%S %p', level = logging.DEBUG)
+logger = logging.getLogger(__name__)
+
+from resources.lib.savestates import SavestateIndex, AUTO_SLOT
+
+class Test_SavestateIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.state_dir = tempfile.mkdtemp()
+        self.index_path = os.path.join(tempfile.mkdtemp(), 'savestates.json')
+
+    def _create_state(self, file_name, age):
+        state_path = os.path.join(self.state_dir, file_name)
+        with open(state_path, 'w') as state_file:
+            state_file.write('state')
+        modified = time.time() - age
+        os.utime(state_path, (modified, modified))
+        return state_path
+
+    def test_newest_numbered_slot_is_found(self):
+        # arrange
+        self._create_state('superrom.state', 300)
+        expected = self._create_state('superrom.state3', 10)
+        self._create_state('superrom.state1', 200)
+        self._create_state('otherrom.state5', 0)
+
+        target = SavestateIndex(self.index_path)
+
+        # act
+        actual_path, actual_slot = target.find_latest([self.state_dir], 'superrom')
+
+        # assert
+        self.assertEqual(expected, actual_path)
+        self.assertEqual(3, actual_slot)
+
+    def test_default_and_auto_slots_are_found(self):
+        # arrange
+        self._create_state('superrom.state', 10)
+        self._create_state('superrom.state.auto', 100)
+        target = SavestateIndex(self.index_path)
+
+        # act
+        _, actual_default = target.find_latest([self.state_dir], 'superrom')
+        self._create_state('superrom.state.auto', 0)
+        _, actual_auto = SavestateIndex(self.index_path).find_latest([self.state_dir], 'superrom')
+
+        # assert
+        self.assertEqual(0, actual_default)
+        self.assertEqual(AUTO_SLOT, actual_auto)
+
+    def test_excluded_slots_are_skipped(self):
+        # arrange
+        self._create_state('superrom.state', 0)
+        expected = self._create_state('superrom.state2', 100)
+        target = SavestateIndex(self.index_path)
+
+        # act
+        actual_path, actual_slot = target.find_latest([self.state_dir], 'superrom', exclude_slots=[0])
+
+        # assert
+        self.assertEqual(expected, actual_path)
+        self.assertEqual(2, actual_slot)
+
+    def test_no_state_returns_none(self):
+        # arrange
+        self._create_state('otherrom.state', 10)
+        target = SavestateIndex(self.index_path)
+
+        # act
+        actual_path, actual_slot = target.find_latest([self.state_dir, '/does/not/exist'], 'superrom')
+
+        # assert
+        self.assertIsNone(actual_path)
+        self.assertIsNone(actual_slot)
+
+    def test_unreadable_directory_is_skipped(self):
+        # arrange
+        expected = self._create_state('superrom.state2', 10)
+        not_a_dir = self._create_state('notadir', 0)
+        target = SavestateIndex(self.index_path)
+
+        # act
+        with self.assertLogs('resources.lib.savestates', level='WARNING'):
+            actual_path, actual_slot = target.find_latest([not_a_dir, self.state_dir], 'superrom')
+
+        # assert
+        self.assertEqual(expected, actual_path)
+        self.assertEqual(2, actual_slot)
+
+    def test_unchanged_directory_is_not_scanned_again(self):
+        # arrange
+        self._create_state('superrom.state2', 10)
+        SavestateIndex(self.index_path).find_latest([self.state_dir], 'superrom')
+        target = SavestateIndex(self.index_path)
+
+        # act
+        with patch.object(SavestateIndex, '_scan') as scan_mock:
+            actual_path, actual_slot = target.find_latest([self.state_dir], 'superrom')
+
+        # assert
+        scan_mock.assert_not_called()
+        self.assertEqual(2, actual_slot)
+
+    def test_overwritten_slot_is_picked_up_without_rescan(self):
+        # arrange
+        self._create_state('superrom.state2', 10)
+        self._create_state('superrom.state4', 100)
+        SavestateIndex(self.index_path).find_latest([self.state_dir], 'superrom')
+        dir_modified = os.path.getmtime(self.state_dir)
+        self._create_state('superrom.state4', 0)
+        os.utime(self.state_dir, (dir_modified, dir_modified))
+        target = SavestateIndex(self.index_path)
+
+        # act
+        with patch.object(SavestateIndex, '_scan') as scan_mock:
+            _, actual_slot = target.find_latest([self.state_dir], 'superrom')
+
+        # assert
+        scan_mock.assert_not_called()
+        self.assertEqual(4, actual_slot)
+
+if __name__ == '__main__':
+   unittest.main()